@@ -3,17 +3,32 @@ LIFESTYLE MART - Python eCommerce Platform
 Main Flask application
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, g, abort, make_response, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
 from wtforms import StringField, PasswordField, TextAreaField, IntegerField, FloatField, SelectField, BooleanField, DateField
 from wtforms.validators import DataRequired, Email, Length, NumberRange, EqualTo
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query, deferred, joinedload, raiseload, selectinload, undefer
+from sqlalchemy.pool import NullPool, StaticPool
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import hashlib
+import hmac
 import os
+import re
 import secrets
+import sqlite3
+import threading
 from dotenv import load_dotenv
 from functools import wraps
 from payment_gateway import SSLCommerzGateway
@@ -31,8 +46,43 @@ class Config:
     # Use local SQLite for development, environment variable for production
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///ecommerce.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # SQLite connections are local files; allow them to be shared across threads
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'check_same_thread': False}}
+        if ':memory:' in SQLALCHEMY_DATABASE_URI or SQLALCHEMY_DATABASE_URI == 'sqlite://':
+            SQLALCHEMY_ENGINE_OPTIONS['poolclass'] = StaticPool
+    elif os.environ.get('DB_NULL_POOL', 'False').lower() == 'true':
+        # Serverless/short-lived processes: open a connection per checkout, keep none idle
+        SQLALCHEMY_ENGINE_OPTIONS = {'poolclass': NullPool}
+    else:
+        # Network databases: drop stale connections instead of failing a request.
+        # Size the pool per worker process to cover its threads with headroom for bursts;
+        # LIFO reuse keeps a few warm connections and lets the rest be recycled.
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
+            # Fail a request after this many seconds rather than queueing on an exhausted pool forever
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+            'pool_use_lifo': True,
+        }
     UPLOAD_FOLDER = 'static/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'SimpleCache'
+    # SimpleCache lives inside one process, so cache.delete() in one worker leaves the
+    # others serving stale categories, home data and stats. Several workers need a shared
+    # backend (RedisCache, MemcachedCache); without one, caching is switched off instead.
+    if CACHE_TYPE in ('SimpleCache', 'simple') and int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+        CACHE_TYPE = 'NullCache'
+    CACHE_DEFAULT_TIMEOUT = 60
+    # Remember successful password checks (per process, in memory) so repeated logins skip the KDF
+    USE_VERIFY_PASSWORD_CACHE = os.environ.get('USE_VERIFY_PASSWORD_CACHE', 'False').lower() == 'true'
+    # Development aid: make any un-eager-loaded relationship access raise instead of querying
+    RAISE_ON_LAZY_LOAD = os.environ.get('RAISE_ON_LAZY_LOAD', 'False').lower() == 'true'
+    # Development aid: log requests that run more SQL statements than this (0 = off)
+    QUERY_COUNT_WARNING = int(os.environ.get('QUERY_COUNT_WARNING', '0'))
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', 'True').lower() == 'true'
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -43,17 +93,72 @@ if openai:
     openai.api_key = os.environ.get('OPENAI_API_KEY')
 
 # Initialize extensions
-db = SQLAlchemy(app)
+# Flask-SQLAlchemy removes the scoped session when each request's app context ends, so
+# nothing outlives the request; keeping attributes loaded after commit just saves the
+# re-SELECT when a view reads back what it wrote (order confirmation, login after signup)
+db = SQLAlchemy(app, session_options={'expire_on_commit': False})
+cache = Cache(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 
+# Argon2id password hashing (memory-hard, 64 MiB per hash)
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+def verify_password_hash(password_hash, password):
+    if not password_hash.startswith('$argon2'):
+        # Accounts created before the Argon2 switch; upgraded on their next login
+        return check_password_hash(password_hash, password)
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
+
+# Successful password checks, kept in this process only and never in the shared cache.
+# Keys are HMACs under a secret generated at startup, so the entries are useless for
+# testing guesses outside this process; failures are never stored, so a brute-force
+# run cannot grow or churn the cache.
+VERIFIED_PASSWORDS_MAX = 1024
+verified_passwords = OrderedDict()
+verified_passwords_lock = threading.Lock()
+verified_passwords_secret = secrets.token_bytes(32)
+
+def verify_password_cached(password_hash, password):
+    key = hmac.new(verified_passwords_secret, password_hash.encode() + b'\0' + password.encode(),
+                   hashlib.sha256).digest()
+    with verified_passwords_lock:
+        if key in verified_passwords:
+            verified_passwords.move_to_end(key)
+            return True
+    if not verify_password_hash(password_hash, password):
+        return False
+    with verified_passwords_lock:
+        verified_passwords[key] = True
+        if len(verified_passwords) > VERIFIED_PASSWORDS_MAX:
+            verified_passwords.popitem(last=False)
+    return True
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')  # readers no longer block the writer
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Database Models
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # admin_users role filter/counts, newest first
+        db.Index('ix_user_role_created', 'role', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -64,18 +169,26 @@ class User(UserMixin, db.Model):
     role = db.Column(db.Enum('user', 'admin', 'seller'), default='user')
     shop_name = db.Column(db.String(100))
     shop_description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationships
-    orders = db.relationship('Order', backref='user', lazy=True)
-    reviews = db.relationship('Review', backref='user', lazy=True)
-    products = db.relationship('Product', backref='seller', lazy=True)
+    orders = db.relationship('Order', back_populates='user', lazy='select')
+    reviews = db.relationship('Review', back_populates='user', lazy='select')
+    products = db.relationship('Product', back_populates='seller', lazy='select')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not app.config['USE_VERIFY_PASSWORD_CACHE']:
+            return verify_password_hash(self.password_hash, password)
+        return verify_password_cached(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        # Legacy Werkzeug (PBKDF2/scrypt) hashes and Argon2 hashes with outdated parameters
+        if not self.password_hash.startswith('$argon2'):
+            return True
+        return password_hasher.check_needs_rehash(self.password_hash)
 
 class Category(db.Model):
     __tablename__ = 'categories'
@@ -84,17 +197,28 @@ class Category(db.Model):
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     image = db.Column(db.String(255))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationships
-    products = db.relationship('Product', backref='category', lazy=True)
+    products = db.relationship('Product', back_populates='category', lazy='select')
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Cover the /shop filter (status, category) + sort prefixes
+        db.Index('ix_prod_status_cat_price', 'status', 'category_id', 'price'),
+        db.Index('ix_prod_status_cat_created', 'status', 'category_id', 'created_at'),
+        db.Index('ix_prod_status_featured', 'status', 'is_featured'),
+        # Unfiltered "newest" listing and the home page eco spotlight (newest by id)
+        db.Index('ix_prod_status_created', 'status', 'created_at'),
+        db.Index('ix_prod_status_eco', 'status', 'is_eco_friendly'),
+        # Category delete guard and per-category counts, regardless of status
+        db.Index('ix_prod_category', 'category_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
-    description = db.Column(db.Text)
+    description = deferred(db.Column(db.Text))  # only loaded by pages that render it
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     price = db.Column(db.Float, nullable=False)
     stock = db.Column(db.Integer, default=0)
@@ -105,14 +229,20 @@ class Product(db.Model):
     is_eco_friendly = db.Column(db.Boolean, default=False)
     eco_description = db.Column(db.Text)
     status = db.Column(db.Enum('active', 'inactive'), default='active')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationships
-    order_items = db.relationship('OrderItem', backref='product', lazy=True)
-    reviews = db.relationship('Review', backref='product', lazy=True)
+    category = db.relationship('Category', back_populates='products', lazy='select')
+    seller = db.relationship('User', back_populates='products', lazy='select')
+    order_items = db.relationship('OrderItem', back_populates='product', lazy='select')
+    reviews = db.relationship('Review', back_populates='product', lazy='select')
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_order_user_created', 'user_id', 'created_at'),
+        db.Index('ix_order_tracking', 'tracking_number'),  # public /track-order lookup
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -140,15 +270,21 @@ class Order(db.Model):
     gift_message = db.Column(db.Text)
     gift_wrap = db.Column(db.Boolean, default=False)
     
+    # Summary of the order lines, stored at checkout so listings don't load OrderItems
+    item_count = db.Column(db.Integer, default=0)
+    subtotal = db.Column(db.Float, default=0)
+    discount = db.Column(db.Float, default=0)  # promo code discount
+    
     # Payment Gateway fields
     transaction_id = db.Column(db.String(100), unique=True)
     val_id = db.Column(db.String(100))
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    updated_at = db.Column(db.DateTime, server_default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
     # Relationships
-    order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    user = db.relationship('User', back_populates='orders', lazy='select')
+    order_items = db.relationship('OrderItem', back_populates='order', lazy='select', cascade='all, delete-orphan')
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
@@ -159,9 +295,19 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     total = db.Column(db.Float, nullable=False)
+    
+    # Relationships
+    order = db.relationship('Order', back_populates='order_items', lazy='select')
+    product = db.relationship('Product', back_populates='order_items', lazy='select')
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_review_prod_status_created', 'product_id', 'status', 'created_at'),
+        # admin_reviews: status filter and the unfiltered listing, both newest first
+        db.Index('ix_review_status_created', 'status', 'created_at'),
+        db.Index('ix_review_created', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -169,7 +315,11 @@ class Review(db.Model):
     rating = db.Column(db.Integer, nullable=False)
     review_text = db.Column(db.Text)
     status = db.Column(db.Enum('approved', 'pending', 'rejected'), default='pending')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    
+    # Relationships
+    product = db.relationship('Product', back_populates='reviews', lazy='select')
+    user = db.relationship('User', back_populates='reviews', lazy='select')
 
 class FlashDeal(db.Model):
     __tablename__ = 'flash_deals'
@@ -182,7 +332,7 @@ class FlashDeal(db.Model):
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationship
     product = db.relationship('Product', backref='flash_deals')
@@ -201,7 +351,7 @@ class Offer(db.Model):
     start_date = db.Column(db.DateTime, default=datetime.utcnow)
     end_date = db.Column(db.DateTime, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
 
 class GiftCard(db.Model):
     __tablename__ = 'gift_cards'
@@ -215,7 +365,7 @@ class GiftCard(db.Model):
     message = db.Column(db.Text)
     is_redeemed = db.Column(db.Boolean, default=False)
     expiry_date = db.Column(db.DateTime)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationship
     purchaser = db.relationship('User', foreign_keys=[purchaser_id], backref='purchased_gift_cards')
@@ -226,7 +376,7 @@ class Wishlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationships
     user = db.relationship('User', backref='wishlist_items', lazy=True)
@@ -241,13 +391,117 @@ class Message(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=True)
     content = db.Column(db.Text, nullable=False)
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
     # Relationships
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     receiver = db.relationship('User', foreign_keys=[receiver_id], backref='received_messages')
     product = db.relationship('Product', backref='related_messages')
 
+@event.listens_for(Query, 'before_compile', retval=True)
+def raise_on_lazy_load(query):
+    """With RAISE_ON_LAZY_LOAD on, surface N+1 lazy loads as errors during development;
+    every query eager-loads what its page renders."""
+    if not app.config['RAISE_ON_LAZY_LOAD']:
+        return query
+    return query.options(raiseload('*', sql_only=True))
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_request_queries(conn, cursor, statement, parameters, context, executemany):
+    if app.config['QUERY_COUNT_WARNING'] and has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+@app.after_request
+def warn_on_query_count(response):
+    limit = app.config['QUERY_COUNT_WARNING']
+    if limit and g.get('query_count', 0) > limit:
+        app.logger.warning('%s %s ran %d SQL statements (limit %d)',
+                           request.method, request.path, g.query_count, limit)
+    return response
+
+def strict(*options):
+    """Loader options for db.session.get that also lock in the eager loads:
+    with RAISE_ON_LAZY_LOAD on, anything not listed raises when accessed."""
+    if app.config['RAISE_ON_LAZY_LOAD']:
+        return [*options, raiseload('*', sql_only=True)]
+    return list(options)
+
+# Full-text product search (SQLite FTS5, kept in sync with products by triggers)
+PRODUCT_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, brand, content='products', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description, brand) "
+    "VALUES (new.id, new.name, new.description, new.brand); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description, brand) "
+    "VALUES ('delete', old.id, old.name, old.description, old.brand); END",
+    # Only the indexed columns: stock decrements and price/status edits leave the FTS row alone
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, brand ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description, brand) "
+    "VALUES ('delete', old.id, old.name, old.description, old.brand); "
+    "INSERT INTO products_fts(rowid, name, description, brand) "
+    "VALUES (new.id, new.name, new.description, new.brand); END",
+]
+product_fts_enabled = False
+
+@event.listens_for(db.metadata, 'after_create')
+def create_product_fts(target, connection, **kw):
+    global product_fts_enabled
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+        ).first()
+        for statement in PRODUCT_FTS_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            # Index the products that were added before the FTS table existed
+            connection.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        product_fts_enabled = True
+    except OperationalError:
+        # SQLite build without FTS5 - shop search falls back to LIKE
+        product_fts_enabled = False
+
+def detect_product_fts():
+    """Use the FTS index whenever products_fts is there and readable, whether or not this
+    process ran create_all() (AUTO_CREATE_TABLES off, tables made by database_setup.py)"""
+    global product_fts_enabled
+    if db.engine.dialect.name != 'sqlite':
+        return
+    try:
+        with db.engine.connect() as connection:
+            # Also fails when the table exists but this SQLite build has no FTS5 module
+            connection.exec_driver_sql("SELECT 1 FROM products_fts LIMIT 0")
+        product_fts_enabled = True
+    except OperationalError:
+        product_fts_enabled = False
+
+# PostgreSQL equivalent: GIN index over the same tsvector expression the search uses.
+# SQLAlchemy only compiles to_tsvector() once its postgresql dialect has been imported.
+product_search_tsvector = db.func.to_tsvector(
+    db.text("'english'::regconfig"),
+    db.func.coalesce(Product.name, '') + ' ' + db.func.coalesce(Product.description, '') + ' ' +
+    db.func.coalesce(Product.brand, ''),
+    type_=postgresql.TSVECTOR,
+)
+db.Index('ix_prod_search_tsv', product_search_tsvector, postgresql_using='gin').ddl_if(dialect='postgresql')
+
+def product_search_filter(search):
+    """Filter clause for a product search, using the full-text index when one is available"""
+    if db.engine.dialect.name == 'postgresql':
+        return product_search_tsvector.op('@@')(db.func.plainto_tsquery('english', search))
+    terms = re.findall(r'\w+', search)
+    if not product_fts_enabled or not terms:
+        return Product.name.contains(search) | Product.description.contains(search) | Product.brand.contains(search)
+    # Quote each term (FTS query syntax is not user-safe) and prefix-match it
+    match = ' '.join(f'"{term}"*' for term in terms)
+    matching_ids = db.select(db.literal_column('rowid')).select_from(db.text('products_fts')).where(
+        db.text('products_fts MATCH :match').bindparams(match=match)
+    )
+    return Product.id.in_(matching_ids)
+
 # Forms
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -324,7 +578,13 @@ class GiftCardForm(FlaskForm):
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Static assets never need the user, so don't spend a query on them
+    if request.path.startswith('/static/') or request.path == '/favicon.ico':
+        return None
+    # Memoize per request so repeated loader calls reuse the same row
+    if 'user_obj' not in g:
+        g.user_obj = db.session.get(User, int(user_id))
+    return g.user_obj
 
 # Helper functions
 def admin_required(f):
@@ -345,18 +605,140 @@ def seller_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+_order_prefix = (None, '')  # (date, 'LSMYYYYMMDD') - only re-formatted when the day changes
+
 def generate_order_number():
-    return f"LSM{datetime.now().strftime('%Y%m%d')}{secrets.randbelow(10000):04d}"
+    global _order_prefix
+    # Read and replace the pair as one tuple so a concurrent thread never sees a mixed date/prefix
+    day, prefix = _order_prefix
+    today = date.today()
+    if day != today:
+        prefix = 'LSM' + today.strftime('%Y%m%d')
+        _order_prefix = (today, prefix)
+    # 24 random bits rather than 4 digits: far fewer same-day clashes on the unique order_number
+    return f"{prefix}{secrets.token_hex(3).upper()}"
+
+def get_cart_products(cart_items):
+    """Fetch every active product in the session cart with a single IN query, keyed by id"""
+    ids = [int(product_id) for product_id in cart_items]
+    if not ids:
+        return {}
+    return {p.id: p for p in Product.query.filter(Product.id.in_(ids), Product.status == 'active').all()}
+
+class KeysetPagination:
+    """A page of ``query`` found by seeking past a neighbouring row instead of OFFSET/COUNT.
+
+    The cursor is the id of the last row of the previous page (``?after=``) or the
+    first row of the next page (``?before=``); rows are ordered by ``sort_column``
+    with the id as tie-breaker. Exposes the ``items``/``has_prev``/``has_next``
+    names of Flask-SQLAlchemy's Pagination plus ``prev_cursor``/``next_cursor``.
+    """
+    def __init__(self, query, sort_column, descending=False, per_page=20):
+        id_column = sort_column.class_.id
+        after = request.args.get('after', type=int)
+        before = request.args.get('before', type=int)
+        cursor = after if after is not None else before
+        backwards = after is None and before is not None
+        
+        if cursor is not None and not db.session.query(db.exists().where(id_column == cursor)).scalar():
+            # Unknown or deleted cursor row: start from the first page
+            cursor, backwards = None, False
+        
+        # Walking backwards runs the query in the opposite order and flips the rows afterwards
+        reverse = descending != backwards
+        key = db.tuple_(sort_column, id_column)
+        if cursor is not None:
+            # Compare against the stored value in SQL so it is never round-tripped through Python types
+            anchor = db.tuple_(db.select(sort_column).where(id_column == cursor).scalar_subquery(), cursor)
+            query = query.filter(key < anchor if reverse else key > anchor)
+        direction = db.desc if reverse else db.asc
+        rows = query.order_by(direction(sort_column), direction(id_column)).limit(per_page + 1).all()
+        
+        more = len(rows) > per_page
+        self.items = rows[:per_page]
+        if backwards:
+            self.items.reverse()
+            self.has_prev, self.has_next = more, True
+        else:
+            self.has_prev, self.has_next = cursor is not None, more
+        self.prev_cursor = self.items[0].id if self.items else None
+        self.next_cursor = self.items[-1].id if self.items else None
+
+def estimated_row_count(model):
+    """Row count of a whole table; on PostgreSQL large tables use the planner's estimate
+    instead of a COUNT(*) scan"""
+    if db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(db.text('SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)'),
+                                      {'table': model.__tablename__}).scalar()
+        # Small (or never analyzed, reltuples = -1) tables are cheap to count exactly
+        if estimate is not None and estimate >= 1000:
+            return estimate
+    return db.session.query(db.func.count()).select_from(model).scalar()
+
+def save_cart(cart):
+    """Store the cart in the session along with its item count for the header badge"""
+    session['cart'] = cart
+    session['cart_count'] = sum(cart.values())
+
+def get_cart_count():
+    count = session.get('cart_count')
+    if count is None:
+        # Session cookies issued before the count was stored alongside the cart
+        count = sum(session.get('cart', {}).values())
+    return count
+
+@cache.cached(key_prefix='dashboard_stats')
+def get_dashboard_stats():
+    """Admin dashboard totals, cached briefly and dropped when orders/users/products change"""
+    # One round-trip: each total is a scalar subquery of a single SELECT
+    total_users, total_products, total_orders, total_revenue = db.session.execute(db.select(
+        db.select(db.func.count()).select_from(User).scalar_subquery(),
+        db.select(db.func.count()).select_from(Product).scalar_subquery(),
+        db.select(db.func.count()).select_from(Order).scalar_subquery(),
+        db.select(db.func.coalesce(db.func.sum(Order.total_amount), 0)).scalar_subquery(),
+    )).one()
+    return {
+        'total_users': total_users,
+        'total_products': total_products,
+        'total_orders': total_orders,
+        'total_revenue': total_revenue,
+    }
 
-# Routes
-@app.route('/')
-def index():
+@cache.cached(timeout=600, key_prefix='categories_all')
+def get_categories():
+    """Category ids and names for filters and form choices, dropped when a category changes"""
+    return [{'id': id, 'name': name} for id, name in db.session.execute(db.select(Category.id, Category.name))]
+
+@cache.cached(timeout=300, key_prefix='admin_categories')
+def get_category_totals():
+    """Catalog-wide figures for the admin categories overview, dropped whenever a category or product changes"""
+    total_categories, total_products, active_categories = db.session.execute(db.select(
+        db.select(db.func.count(Category.id)).scalar_subquery(),
+        db.select(db.func.count(Product.id)).scalar_subquery(),
+        db.select(db.func.count(db.distinct(Product.category_id))).scalar_subquery(),
+    )).one()
+    return {
+        'total_categories': total_categories,
+        'total_products': total_products,
+        'active_categories': active_categories,
+    }
+
+def product_card(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'brand': product.brand,
+        'image': product.image,
+        'price': product.price,
+        'is_eco_friendly': product.is_eco_friendly,
+        'eco_description': product.eco_description,
+    }
+
+@cache.memoize(timeout=300)
+def get_home_payload():
+    """Home page catalog data and flash deals as plain dicts, dropped when products or categories change"""
     products = Product.query.filter_by(is_featured=True, status='active').limit(8).all()
     categories = Category.query.all()
-    # Get active flash deals
-    flash_deals = FlashDeal.query.filter_by(is_active=True).filter(
-        FlashDeal.end_time > datetime.utcnow()
-    ).order_by(FlashDeal.end_time.asc()).limit(4).all()
     
     # Get brand seller IDs for direct messaging
     brand_emails = {
@@ -365,25 +747,62 @@ def index():
         'Yellow': 'yellow@seller.bd',
         'Walton': 'walton@seller.bd'
     }
-    brand_seller_ids = {}
-    for brand_name, email in brand_emails.items():
-        seller = User.query.filter_by(email=email).first()
-        if seller:
-            brand_seller_ids[brand_name] = seller.id
-            
+    sellers = User.query.filter(User.email.in_(brand_emails.values())).all()
+    seller_ids_by_email = {seller.email: seller.id for seller in sellers}
+    brand_seller_ids = {brand_name: seller_ids_by_email[email]
+                        for brand_name, email in brand_emails.items() if email in seller_ids_by_email}
+    
     # Get eco-friendly products for Green Choice spotlight (newest first)
     eco_products = Product.query.filter_by(is_eco_friendly=True, status='active').order_by(Product.id.desc()).limit(4).all()
     
-    return render_template('index.html', 
-                          products=products, 
-                          categories=categories, 
+    # Flash deals running when the payload was built, soonest-ending first. index() drops
+    # any that end while cached; the spares keep four on show until the cache refreshes.
+    flash_deals = FlashDeal.query.options(joinedload(FlashDeal.product)).filter_by(is_active=True).filter(
+        FlashDeal.end_time > datetime.utcnow()
+    ).order_by(FlashDeal.end_time.asc()).limit(8).all()
+    
+    return {
+        'products': [product_card(p) for p in products],
+        'categories': [{'id': c.id, 'name': c.name, 'description': c.description, 'image': c.image}
+                       for c in categories],
+        'brand_seller_ids': brand_seller_ids,
+        'eco_products': [product_card(p) for p in eco_products],
+        'flash_deals': [{
+            'product': product_card(deal.product),
+            'original_price': deal.original_price,
+            'deal_price': deal.deal_price,
+            'discount_percent': deal.discount_percent,
+            'end_time': deal.end_time,
+        } for deal in flash_deals],
+    }
+
+def conditional_page(html):
+    """Send a rendered catalog page with an ETag; a matching If-None-Match gets an empty 304"""
+    response = make_response(html)
+    response.add_etag()
+    # The header shows the visitor's name and cart, so only their own browser may keep a copy,
+    # and it has to revalidate each time so stock and price changes show up immediately
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# Routes
+@app.route('/')
+def index():
+    home = get_home_payload()
+    # Deals are cached with the rest of the page data; hide any that have ended since
+    now = datetime.utcnow()
+    flash_deals = [deal for deal in home['flash_deals'] if deal['end_time'] > now][:4]
+    
+    return conditional_page(render_template('index.html', 
+                          products=home['products'], 
+                          categories=home['categories'], 
                           flash_deals=flash_deals,
-                          brand_seller_ids=brand_seller_ids,
-                          eco_products=eco_products)
+                          brand_seller_ids=home['brand_seller_ids'],
+                          eco_products=home['eco_products']))
 
 @app.route('/shop')
 def shop():
-    page = request.args.get('page', 1, type=int)
     category_id = request.args.get('category', type=int)
     brand = request.args.get('brand', '')
     search = request.args.get('search', '')
@@ -394,7 +813,8 @@ def shop():
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
     
-    query = Product.query.filter_by(status='active')
+    # The quick-view modal shows the description, so load it with the page
+    query = Product.query.options(undefer(Product.description)).filter_by(status='active')
     
     if eco_friendly:
         query = query.filter_by(is_eco_friendly=True)
@@ -406,7 +826,7 @@ def shop():
         query = query.filter_by(brand=brand)
     
     if search:
-        query = query.filter(Product.name.contains(search) | Product.description.contains(search) | Product.brand.contains(search))
+        query = query.filter(product_search_filter(search))
     
     if min_price is not None:
         query = query.filter(Product.price >= min_price)
@@ -415,29 +835,30 @@ def shop():
         query = query.filter(Product.price <= max_price)
     
     if sort == 'price_low':
-        query = query.order_by(Product.price.asc())
+        products = KeysetPagination(query, Product.price, per_page=12)
     elif sort == 'price_high':
-        query = query.order_by(Product.price.desc())
+        products = KeysetPagination(query, Product.price, descending=True, per_page=12)
     elif sort == 'newest':
-        query = query.order_by(Product.created_at.desc())
+        products = KeysetPagination(query, Product.created_at, descending=True, per_page=12)
     else:
-        query = query.order_by(Product.name.asc())
-    
-    products = query.paginate(page=page, per_page=12, error_out=False)
-    categories = Category.query.all()
+        products = KeysetPagination(query, Product.name, per_page=12)
+    categories = get_categories()
     # Get unique brand names for the filter
     brands = db.session.query(Product.brand).filter(Product.status == 'active', Product.brand != None).distinct().all()
     brands = [b[0] for b in brands if b[0]]
     
-    return render_template('shop.html', products=products, categories=categories, brands=brands,
+    # Prev/next links repeat every filter in the query string, with only the cursor replaced
+    filter_args = {key: value for key, value in request.args.items() if key not in ('before', 'after')}
+    return conditional_page(render_template('shop.html', products=products, categories=categories, brands=brands,
                          category_id=category_id, brand=brand, search=search, sort=sort,
-                         min_price=min_price, max_price=max_price, eco_friendly=eco_friendly)
+                         min_price=min_price, max_price=max_price, eco_friendly=eco_friendly,
+                         filter_args=filter_args))
 
 
 
 @app.route('/product/<int:id>')
 def product_detail(id):
-    product = Product.query.get_or_404(id)
+    product = db.session.get(Product, id, options=[undefer(Product.description)]) or abort(404)
     if product.status != 'active':
         return redirect(url_for('shop'))
     
@@ -447,9 +868,18 @@ def product_detail(id):
         Product.status == 'active'
     ).limit(4).all()
     
-    reviews = Review.query.filter_by(product_id=id, status='approved').order_by(Review.created_at.desc()).all()
+    # Rating summary is aggregated in SQL; only one page of reviews is loaded
+    avg_rating, review_count = db.session.query(
+        db.func.avg(Review.rating), db.func.count(Review.id)
+    ).filter_by(product_id=id, status='approved').one()
+    
+    reviews_page = request.args.get('reviews_page', 1, type=int)
+    reviews = Review.query.options(selectinload(Review.user)).filter_by(
+        product_id=id, status='approved'
+    ).order_by(Review.created_at.desc()).paginate(page=reviews_page, per_page=10, error_out=False)
     
-    return render_template('product.html', product=product, related_products=related_products, reviews=reviews)
+    return conditional_page(render_template('product.html', product=product, related_products=related_products,
+                         reviews=reviews, avg_rating=avg_rating or 0, review_count=review_count))
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -460,6 +890,9 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         if user and user.check_password(form.password.data):
+            if user.password_needs_rehash():
+                user.set_password(form.password.data)
+                db.session.commit()
             login_user(user)
             next_page = request.args.get('next')
             return redirect(next_page) if next_page else redirect(url_for('index'))
@@ -488,6 +921,7 @@ def signup():
         user.set_password(form.password.data)
         db.session.add(user)
         db.session.commit()
+        cache.delete('dashboard_stats')
         
         flash('Account created successfully! Please log in.', 'success')
         return redirect(url_for('login'))
@@ -505,7 +939,9 @@ def logout():
 @login_required
 def profile():
     # Get user's orders
-    orders = Order.query.filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).limit(10).all()
+    orders = Order.query.options(
+        selectinload(Order.order_items).selectinload(OrderItem.product)
+    ).filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).limit(10).all()
     return render_template('profile.html', orders=orders)
 
 @app.route('/update_profile', methods=['POST'])
@@ -567,7 +1003,9 @@ def seller_dashboard():
     product_ids = [p.id for p in seller_products]
     
     # Get recent order items for this seller's products
-    recent_sales = OrderItem.query.filter(OrderItem.product_id.in_(product_ids)).order_by(OrderItem.id.desc()).limit(10).all()
+    recent_sales = OrderItem.query.options(
+        joinedload(OrderItem.order).joinedload(Order.user), joinedload(OrderItem.product)
+    ).filter(OrderItem.product_id.in_(product_ids)).order_by(OrderItem.id.desc()).limit(10).all()
     
     total_sales = sum(item.total for item in OrderItem.query.filter(OrderItem.product_id.in_(product_ids)).all())
     
@@ -580,14 +1018,14 @@ def seller_dashboard():
 @seller_required
 def seller_products():
     page = request.args.get('page', 1, type=int)
-    products = Product.query.filter_by(seller_id=current_user.id).order_by(Product.created_at.desc()).paginate(page=page, per_page=10, error_out=False)
+    products = Product.query.options(joinedload(Product.category)).filter_by(seller_id=current_user.id).order_by(Product.created_at.desc()).paginate(page=page, per_page=10, error_out=False)
     return render_template('seller/products.html', products=products)
 
 @app.route('/seller/products/add', methods=['GET', 'POST'])
 @seller_required
 def seller_add_product():
     form = ProductForm()
-    form.category_id.choices = [(c.id, c.name) for c in Category.query.all()]
+    form.category_id.choices = [(c['id'], c['name']) for c in get_categories()]
     
     if form.validate_on_submit():
         product = Product(
@@ -606,6 +1044,9 @@ def seller_add_product():
         )
         db.session.add(product)
         db.session.commit()
+        cache.delete('dashboard_stats')
+        cache.delete_memoized(get_home_payload)
+        cache.delete('admin_categories')
         
         flash('Product listed successfully!', 'success')
         return redirect(url_for('seller_products'))
@@ -615,14 +1056,14 @@ def seller_add_product():
 @app.route('/seller/products/edit/<int:id>', methods=['GET', 'POST'])
 @seller_required
 def seller_edit_product(id):
-    product = Product.query.get_or_404(id)
+    product = db.session.get(Product, id) or abort(404)
     # Security check: ensure the product belongs to this seller
     if product.seller_id != current_user.id and current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
         return redirect(url_for('seller_products'))
         
     form = ProductForm(obj=product)
-    form.category_id.choices = [(c.id, c.name) for c in Category.query.all()]
+    form.category_id.choices = [(c['id'], c['name']) for c in get_categories()]
     
     if form.validate_on_submit():
         product.name = form.name.data
@@ -637,6 +1078,8 @@ def seller_edit_product(id):
         product.eco_description = form.eco_description.data
         
         db.session.commit()
+        cache.delete_memoized(get_home_payload)
+        cache.delete('admin_categories')
         flash('Product updated successfully!', 'success')
         return redirect(url_for('seller_products'))
     
@@ -645,13 +1088,16 @@ def seller_edit_product(id):
 @app.route('/seller/products/delete/<int:id>')
 @seller_required
 def seller_delete_product(id):
-    product = Product.query.get_or_404(id)
+    product = db.session.get(Product, id) or abort(404)
     if product.seller_id != current_user.id and current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
         return redirect(url_for('seller_products'))
         
     db.session.delete(product)
     db.session.commit()
+    cache.delete('dashboard_stats')
+    cache.delete_memoized(get_home_payload)
+    cache.delete('admin_categories')
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('seller_products'))
 
@@ -669,7 +1115,7 @@ def inbox():
     # Fetch user objects for these IDs
     conversations = []
     for uid in set(user_ids):
-        user = User.query.get(uid)
+        user = db.session.get(User, uid)
         if user:
             # Get the last message in this conversation
             last_msg = Message.query.filter(
@@ -690,7 +1136,7 @@ def inbox():
 @app.route('/chat/<int:user_id>')
 @login_required
 def chat(user_id):
-    other_user = User.query.get_or_404(user_id)
+    other_user = db.session.get(User, user_id) or abort(404)
     
     # Mark messages from this user to me as read
     Message.query.filter_by(sender_id=user_id, receiver_id=current_user.id, is_read=False).update({'is_read': True})
@@ -710,7 +1156,7 @@ def chat(user_id):
     
     conversations = []
     for uid in set(u_ids):
-        user = User.query.get(uid)
+        user = db.session.get(User, uid)
         if user:
             last_msg = Message.query.filter(
                 ((Message.sender_id == current_user.id) & (Message.receiver_id == uid)) |
@@ -733,7 +1179,7 @@ def send_message():
         flash('Invalid message data.', 'danger')
         return redirect(request.referrer or url_for('inbox'))
     
-    receiver = User.query.get_or_404(receiver_id)
+    receiver = db.session.get(User, receiver_id) or abort(404)
     
     message = Message(
         sender_id=current_user.id,
@@ -992,43 +1438,46 @@ def careers():
 @app.route('/cart')
 def cart():
     cart_items = session.get('cart', {})
+    cart_products = get_cart_products(cart_items)
     products = []
-    total = 0
     
     for product_id, quantity in cart_items.items():
-        product = Product.query.get(int(product_id))
-        if product and product.status == 'active':
-            subtotal = product.price * quantity
-            total += subtotal
+        product = cart_products.get(int(product_id))
+        if product:
             products.append({
                 'product': product,
                 'quantity': quantity,
-                'subtotal': subtotal
+                'subtotal': product.price * quantity
             })
     
+    total = sum(item['subtotal'] for item in products)
+    
     return render_template('cart.html', products=products, total=total)
 
 @app.route('/add_to_cart', methods=['POST'])
 def add_to_cart():
-    product_id = request.form.get('product_id')
-    quantity = int(request.form.get('quantity', 1))
+    product_id = request.form.get('product_id', type=int)
+    quantity = request.form.get('quantity', 1, type=int)
+    if product_id is None:
+        abort(400)
     
-    product = Product.query.get_or_404(product_id)
+    product = db.session.get(Product, product_id) or abort(404)
     if product.stock < quantity:
-        return jsonify({'success': False, 'message': 'Not enough stock available'})
+        return jsonify({'success': False, 'message': 'Not enough stock available', 'stock': product.stock})
     
+    # Session cart keys are strings (the session is stored as JSON)
+    cart_key = str(product_id)
     cart = session.get('cart', {})
-    cart[product_id] = cart.get(product_id, 0) + quantity
-    session['cart'] = cart
-    
-    cart_count = sum(cart.values())
+    cart[cart_key] = cart.get(cart_key, 0) + quantity
+    save_cart(cart)
     
     # Return JSON for AJAX/fetch requests (main.js sends X-Requested-With header)
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return jsonify({
             'success': True, 
             'message': f'{product.name} added to cart!',
-            'cart_count': cart_count
+            'cart_count': session['cart_count'],
+            'stock': product.stock
         })
     
     # Regular form submissions (non-JS fallback)
@@ -1038,36 +1487,40 @@ def add_to_cart():
 @app.route('/cart_count')
 def cart_count_api():
     """Return the current cart item count as JSON for the header badge."""
-    cart = session.get('cart', {})
-    count = sum(cart.values())
-    return jsonify({'count': count})
+    return jsonify({'count': get_cart_count()})
 
 
 @app.route('/update_cart', methods=['POST'])
 def update_cart():
-    product_id = request.form.get('product_id')
-    quantity = int(request.form.get('quantity', 0))
+    product_id = request.form.get('product_id', type=int)
+    quantity = request.form.get('quantity', 0, type=int)
+    if product_id is None:
+        abort(400)
+    cart_key = str(product_id)
     
     cart = session.get('cart', {})
     
+    product = None
     if quantity > 0:
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if product and product.stock >= quantity:
-            cart[product_id] = quantity
+            if cart.get(cart_key) != quantity:
+                cart[cart_key] = quantity
+                save_cart(cart)
         else:
             if request.headers.get('Accept') and 'application/json' in request.headers.get('Accept', ''):
-                return jsonify({'success': False, 'message': 'Not enough stock available'})
+                return jsonify({'success': False, 'message': 'Not enough stock available',
+                                'stock': product.stock if product else 0})
             flash('Not enough stock available', 'warning')
             return redirect(url_for('cart'))
-    else:
-        cart.pop(product_id, None)
-    
-    session['cart'] = cart
+    elif cart.pop(cart_key, None) is not None:
+        save_cart(cart)
     
     if request.headers.get('Accept') and 'application/json' in request.headers.get('Accept', ''):
         return jsonify({
             'success': True,
-            'cart_count': sum(cart.values())
+            'cart_count': get_cart_count(),
+            'stock': product.stock if product else None
         })
     return redirect(url_for('cart'))
 
@@ -1086,11 +1539,9 @@ def apply_promo():
         
     # Calculate cart total
     cart_items = session.get('cart', {})
-    total = 0
-    for pid, qty in cart_items.items():
-        product = Product.query.get(pid)
-        if product:
-            total += product.price * qty
+    cart_products = get_cart_products(cart_items)
+    total = sum(cart_products[int(pid)].price * qty
+                for pid, qty in cart_items.items() if int(pid) in cart_products)
             
     if total < offer.min_purchase:
         flash(f'Minimum purchase of ৳{offer.min_purchase} required for this promo.', 'warning')
@@ -1117,22 +1568,18 @@ def remove_promo():
     flash('Promo code removed.', 'info')
     return redirect(url_for('cart'))
 
-@app.route('/cart_count')
-def cart_count():
-    cart = session.get('cart', {})
-    return jsonify({'count': sum(cart.values())})
-
 @app.route('/remove_from_cart', methods=['POST'])
 def remove_from_cart():
-    product_id = request.form.get('product_id')
+    product_id = request.form.get('product_id', type=int)
     cart = session.get('cart', {})
-    cart.pop(product_id, None)
-    session['cart'] = cart
+    # Only rewrite the session cookie when the cart actually changed
+    if cart.pop(str(product_id), None) is not None:
+        save_cart(cart)
     
     if request.headers.get('Accept') and 'application/json' in request.headers.get('Accept', ''):
         return jsonify({
             'success': True,
-            'cart_count': sum(cart.values())
+            'cart_count': get_cart_count()
         })
     flash('Item removed from cart', 'info')
     return redirect(url_for('cart'))
@@ -1140,13 +1587,15 @@ def remove_from_cart():
 @app.route('/wishlist')
 @login_required
 def wishlist():
-    wishlist_items = Wishlist.query.filter_by(user_id=current_user.id).all()
+    wishlist_items = Wishlist.query.options(joinedload(Wishlist.product)).filter_by(user_id=current_user.id).all()
     return render_template('wishlist.html', wishlist_items=wishlist_items)
 
 @app.route('/add_to_wishlist', methods=['POST'])
 @login_required
 def add_to_wishlist():
-    product_id = request.form.get('product_id')
+    product_id = request.form.get('product_id', type=int)
+    if product_id is None:
+        abort(400)
     
     # Check if already in wishlist
     existing = Wishlist.query.filter_by(user_id=current_user.id, product_id=product_id).first()
@@ -1166,7 +1615,7 @@ def add_to_wishlist():
 @app.route('/remove_from_wishlist', methods=['POST'])
 @login_required
 def remove_from_wishlist():
-    product_id = request.form.get('product_id')
+    product_id = request.form.get('product_id', type=int)
     wishlist_item = Wishlist.query.filter_by(user_id=current_user.id, product_id=product_id).first()
     
     if wishlist_item:
@@ -1189,6 +1638,7 @@ def checkout():
         return redirect(url_for('shop'))
     
     form = PaymentForm()
+    cart_products = get_cart_products(cart)
     
     if request.method == 'POST':
         form = PaymentForm(request.form)
@@ -1199,18 +1649,28 @@ def checkout():
             order_items = []
             
             for product_id, quantity in cart.items():
-                product = Product.query.get(product_id)
-                if product and product.stock >= quantity:
-                    subtotal = product.price * quantity
-                    total_amount += subtotal
-                    order_items.append({
-                        'product_id': product_id,
-                        'quantity': quantity,
-                        'price': product.price,
-                        'total': subtotal
-                    })
-                    # Update stock
-                    product.stock -= quantity
+                product = cart_products.get(int(product_id))
+                if not product:
+                    continue
+                # Compare-and-decrement in one UPDATE so concurrent checkouts can't oversell
+                product_name, price = product.name, product.price
+                result = db.session.execute(
+                    db.update(Product)
+                    .where(Product.id == product.id, Product.stock >= quantity)
+                    .values(stock=Product.stock - quantity)
+                )
+                if result.rowcount == 0:
+                    db.session.rollback()
+                    flash(f'Not enough stock available for {product_name}', 'danger')
+                    return redirect(url_for('cart'))
+                subtotal = price * quantity
+                total_amount += subtotal
+                order_items.append({
+                    'product_id': product.id,
+                    'quantity': quantity,
+                    'price': price,
+                    'total': subtotal
+                })
             
             if not order_items:
                 flash('No valid products in cart', 'danger')
@@ -1258,26 +1718,24 @@ def checkout():
                 is_gift=is_gift,
                 gift_message=request.form.get('gift_message'),
                 gift_wrap=gift_wrap,
+                item_count=sum(item['quantity'] for item in order_items),
+                subtotal=total_amount,
+                discount=promo_discount,
                 estimated_delivery=datetime.utcnow() + (timedelta(days=1) if delivery_type == 'express' else timedelta(days=3))
             )
             db.session.add(order)
             db.session.flush()
             
-            # Add order items
-            for item in order_items:
-                order_item = OrderItem(
-                    order_id=order.id,
-                    product_id=item['product_id'],
-                    quantity=item['quantity'],
-                    price=item['price'],
-                    total=item['total']
-                )
-                db.session.add(order_item)
+            # Add order items in a single multi-row INSERT
+            db.session.execute(OrderItem.__table__.insert(), [
+                {'order_id': order.id, **item} for item in order_items
+            ])
             
             db.session.commit()
+            cache.delete('dashboard_stats')
             
             # Clear cart
-            session['cart'] = {}
+            save_cart({})
             
             # If not COD, redirect to payment gateway
             if form.payment_method.data != 'cod':
@@ -1292,12 +1750,9 @@ def checkout():
             flash(f'Order {order_number} placed successfully!', 'success')
             return redirect(url_for('order_confirmation', id=order.id))
     
-    # Calculate total for display
-    total = 0
-    for product_id, quantity in cart.items():
-        product = Product.query.get(product_id)
-        if product:
-            total += product.price * quantity
+    # Calculate total for display from the products already fetched above
+    total = sum(cart_products[int(product_id)].price * quantity
+                for product_id, quantity in cart.items() if int(product_id) in cart_products)
     
     return render_template('checkout.html', form=form, total=total, cart_items=len(cart))
 
@@ -1398,7 +1853,7 @@ def process_simulation():
 @app.route('/add_review/<int:product_id>', methods=['POST'])
 @login_required
 def add_review(product_id):
-    product = Product.query.get_or_404(product_id)
+    product = db.session.get(Product, product_id) or abort(404)
     form = ReviewForm(request.form)
     
     if form.validate_on_submit():
@@ -1429,7 +1884,9 @@ def add_review(product_id):
 @app.route('/order_confirmation/<int:id>')
 @login_required
 def order_confirmation(id):
-    order = Order.query.get_or_404(id)
+    order = db.session.get(Order, id, options=strict(
+        selectinload(Order.order_items).selectinload(OrderItem.product)
+    )) or abort(404)
     if order.user_id != current_user.id:
         return redirect(url_for('index'))
     
@@ -1439,33 +1896,22 @@ def order_confirmation(id):
 @app.route('/admin')
 @admin_required
 def admin_dashboard():
-    total_users = User.query.count()
-    total_products = Product.query.count()
-    total_orders = Order.query.count()
-    total_revenue = db.session.query(db.func.sum(Order.total_amount)).scalar() or 0
-    
-    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(10).all()
+    recent_orders = Order.query.options(joinedload(Order.user)).order_by(Order.created_at.desc()).limit(10).all()
     
     return render_template('admin/dashboard.html', 
-                         total_users=total_users,
-                         total_products=total_products,
-                         total_orders=total_orders,
-                         total_revenue=total_revenue,
-                         recent_orders=recent_orders)
+                         recent_orders=recent_orders,
+                         **get_dashboard_stats())
 
 @app.route('/admin/products')
 @admin_required
 def admin_products():
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     
-    query = Product.query
+    query = Product.query.options(selectinload(Product.category))
     if search:
-        query = query.filter(Product.name.contains(search))
+        query = query.filter(product_search_filter(search))
     
-    products = query.order_by(Product.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    products = KeysetPagination(query, Product.created_at, descending=True)
     
     return render_template('admin/products.html', products=products, search=search)
 
@@ -1473,7 +1919,7 @@ def admin_products():
 @admin_required
 def admin_add_product():
     form = ProductForm()
-    form.category_id.choices = [(c.id, c.name) for c in Category.query.all()]
+    form.category_id.choices = [(c['id'], c['name']) for c in get_categories()]
     
     if form.validate_on_submit():
         product = Product(
@@ -1488,6 +1934,9 @@ def admin_add_product():
         )
         db.session.add(product)
         db.session.commit()
+        cache.delete('dashboard_stats')
+        cache.delete_memoized(get_home_payload)
+        cache.delete('admin_categories')
         
         flash('Product added successfully!', 'success')
         return redirect(url_for('admin_products'))
@@ -1497,9 +1946,9 @@ def admin_add_product():
 @app.route('/admin/products/edit/<int:id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_product(id):
-    product = Product.query.get_or_404(id)
+    product = db.session.get(Product, id) or abort(404)
     form = ProductForm(obj=product)
-    form.category_id.choices = [(c.id, c.name) for c in Category.query.all()]
+    form.category_id.choices = [(c['id'], c['name']) for c in get_categories()]
     
     if form.validate_on_submit():
         product.name = form.name.data
@@ -1512,6 +1961,8 @@ def admin_edit_product(id):
         product.is_featured = form.is_featured.data
         
         db.session.commit()
+        cache.delete_memoized(get_home_payload)
+        cache.delete('admin_categories')
         
         flash('Product updated successfully!', 'success')
         return redirect(url_for('admin_products'))
@@ -1521,9 +1972,12 @@ def admin_edit_product(id):
 @app.route('/admin/products/delete/<int:id>')
 @admin_required
 def admin_delete_product(id):
-    product = Product.query.get_or_404(id)
+    product = db.session.get(Product, id) or abort(404)
     db.session.delete(product)
     db.session.commit()
+    cache.delete('dashboard_stats')
+    cache.delete_memoized(get_home_payload)
+    cache.delete('admin_categories')
     
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('admin_products'))
@@ -1531,29 +1985,33 @@ def admin_delete_product(id):
 @app.route('/admin/orders')
 @admin_required
 def admin_orders():
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', '')
     
-    query = Order.query
+    query = Order.query.options(selectinload(Order.user))
     if status:
         query = query.filter(Order.status == status)
     
-    orders = query.order_by(Order.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    # Every status count in one GROUP BY; the header shows the one being filtered on
+    status_counts = dict(db.session.query(Order.status, db.func.count()).group_by(Order.status).all())
+    total_orders = status_counts.get(status, 0) if status else sum(status_counts.values())
+    orders = KeysetPagination(query, Order.created_at, descending=True)
     
-    return render_template('admin/orders.html', orders=orders, status=status)
+    return render_template('admin/orders.html', orders=orders, status=status, total_orders=total_orders,
+                           status_counts=status_counts)
 
 @app.route('/admin/orders/<int:id>')
 @admin_required
 def admin_order_detail(id):
-    order = Order.query.get_or_404(id)
+    order = db.session.get(Order, id, options=strict(
+        selectinload(Order.user),
+        selectinload(Order.order_items).selectinload(OrderItem.product)
+    )) or abort(404)
     return render_template('admin/order_detail.html', order=order)
 
 @app.route('/admin/orders/update_status/<int:id>', methods=['POST'])
 @admin_required
 def admin_update_order_status(id):
-    order = Order.query.get_or_404(id)
+    order = db.session.get(Order, id) or abort(404)
     new_status = request.form.get('status')
     
     if new_status in ['pending', 'processing', 'shipped', 'delivered', 'cancelled']:
@@ -1574,7 +2032,7 @@ def admin_update_order_status(id):
 @app.route('/admin/orders/<int:id>/tracking', methods=['GET', 'POST'])
 @admin_required
 def admin_order_tracking(id):
-    order = Order.query.get_or_404(id)
+    order = db.session.get(Order, id) or abort(404)
     form = OrderTrackingForm(obj=order)
     
     if form.validate_on_submit():
@@ -1592,7 +2050,7 @@ def admin_order_tracking(id):
 @app.route('/admin/orders/<int:id>/review', methods=['GET', 'POST'])
 @admin_required
 def admin_order_review(id):
-    order = Order.query.get_or_404(id)
+    order = db.session.get(Order, id) or abort(404)
     form = OrderReviewForm(obj=order)
     
     if form.validate_on_submit():
@@ -1618,38 +2076,43 @@ def track_order():
 @app.route('/admin/users')
 @admin_required
 def admin_users():
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     
     query = User.query
     if search:
         query = query.filter(User.name.contains(search) | User.email.contains(search))
     
-    users = query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    role_counts = dict(query.order_by(None).with_entities(User.role, db.func.count()).group_by(User.role).all())
+    users = KeysetPagination(query, User.created_at, descending=True)
+    # Order counts for the whole page in one GROUP BY rather than loading each user's orders
+    order_counts = dict(db.session.query(Order.user_id, db.func.count()).filter(
+        Order.user_id.in_([user.id for user in users.items])
+    ).group_by(Order.user_id).all())
     
-    return render_template('admin/users.html', users=users, search=search)
+    return render_template('admin/users.html', users=users, search=search, role_counts=role_counts,
+                           total_users=sum(role_counts.values()), order_counts=order_counts)
 
 @app.route('/admin/users/<int:id>')
 @admin_required
 def admin_user_detail(id):
-    user = User.query.get_or_404(id)
+    # The page lists the user's orders; their items and the user's reviews are not shown
+    user = db.session.get(User, id, options=strict(selectinload(User.orders))) or abort(404)
     return render_template('admin/user_detail.html', user=user)
 
 @app.route('/admin/users/<int:id>/toggle_role', methods=['POST'])
 @admin_required
 def admin_toggle_user_role(id):
-    user = User.query.get_or_404(id)
-    
     # Prevent changing own role
-    if user.id == current_user.id:
+    if id == current_user.id:
         flash('You cannot change your own role!', 'danger')
         return redirect(url_for('admin_users'))
     
     new_role = request.form.get('role')
     if new_role in ['admin', 'user', 'seller']:
-        user.role = new_role
+        # Single UPDATE by primary key; no need to load the user first
+        result = db.session.execute(db.update(User).where(User.id == id).values(role=new_role))
+        if result.rowcount == 0:
+            abort(404)
         db.session.commit()
         
         flash(f'User role changed to {new_role} successfully!', 'success')
@@ -1661,8 +2124,32 @@ def admin_toggle_user_role(id):
 @app.route('/admin/categories')
 @admin_required
 def admin_categories():
-    categories = Category.query.all()
-    return render_template('admin/categories.html', categories=categories)
+    # Product count and stock value per category, aggregated once and joined to the page
+    product_totals = db.session.query(
+        Product.category_id,
+        db.func.count(Product.id).label('product_count'),
+        db.func.sum(Product.price).label('total_value'),
+    ).group_by(Product.category_id).subquery()
+    query = db.session.query(
+        Category.id, Category.name, Category.description,
+        db.func.coalesce(product_totals.c.product_count, 0).label('product_count'),
+        db.func.coalesce(product_totals.c.total_value, 0).label('total_value'),
+    ).outerjoin(product_totals, product_totals.c.category_id == Category.id)
+    categories = KeysetPagination(query, Category.id, per_page=50)
+    
+    # First three product names of each category on the page, in one windowed query
+    position = db.func.row_number().over(partition_by=Product.category_id, order_by=Product.id).label('position')
+    ranked = db.select(Product.category_id, Product.name, position).where(
+        Product.category_id.in_([category.id for category in categories.items])
+    ).subquery()
+    product_names = {}
+    for category_id, name in db.session.execute(
+        db.select(ranked.c.category_id, ranked.c.name).where(ranked.c.position <= 3).order_by(ranked.c.category_id, ranked.c.position)
+    ):
+        product_names.setdefault(category_id, []).append(name)
+    
+    return render_template('admin/categories.html', categories=categories,
+                           product_names=product_names, totals=get_category_totals())
 
 @app.route('/admin/categories/add', methods=['GET', 'POST'])
 @admin_required
@@ -1675,6 +2162,9 @@ def admin_add_category():
             category = Category(name=name, description=description)
             db.session.add(category)
             db.session.commit()
+            cache.delete_memoized(get_home_payload)
+            cache.delete('admin_categories')
+            cache.delete('categories_all')
             
             flash('Category added successfully!', 'success')
             return redirect(url_for('admin_categories'))
@@ -1686,7 +2176,7 @@ def admin_add_category():
 @app.route('/admin/categories/edit/<int:id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_category(id):
-    category = Category.query.get_or_404(id)
+    category = db.session.get(Category, id) or abort(404)
     
     if request.method == 'POST':
         name = request.form.get('name')
@@ -1696,6 +2186,9 @@ def admin_edit_category(id):
             category.name = name
             category.description = description
             db.session.commit()
+            cache.delete_memoized(get_home_payload)
+            cache.delete('admin_categories')
+            cache.delete('categories_all')
             
             flash('Category updated successfully!', 'success')
             return redirect(url_for('admin_categories'))
@@ -1707,15 +2200,18 @@ def admin_edit_category(id):
 @app.route('/admin/categories/delete/<int:id>')
 @admin_required
 def admin_delete_category(id):
-    category = Category.query.get_or_404(id)
+    category = db.session.get(Category, id) or abort(404)
     
-    # Check if category has products
-    if category.products:
+    # Check if category has products (EXISTS stops at the first row instead of loading them all)
+    if db.session.query(db.exists().where(Product.category_id == id)).scalar():
         flash('Cannot delete category with products!', 'danger')
         return redirect(url_for('admin_categories'))
     
     db.session.delete(category)
     db.session.commit()
+    cache.delete_memoized(get_home_payload)
+    cache.delete('admin_categories')
+    cache.delete('categories_all')
     
     flash('Category deleted successfully!', 'success')
     return redirect(url_for('admin_categories'))
@@ -1723,24 +2219,25 @@ def admin_delete_category(id):
 @app.route('/admin/reviews')
 @admin_required
 def admin_reviews():
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', '')
     
-    query = Review.query
+    # Both are many-to-one, so they come back in the same SELECT as the reviews
+    query = Review.query.options(joinedload(Review.user), joinedload(Review.product))
     if status:
         query = query.filter(Review.status == status)
     
-    reviews = query.order_by(Review.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    total_reviews = query.order_by(None).count() if status else estimated_row_count(Review)
+    reviews = KeysetPagination(query, Review.created_at, descending=True)
     
-    return render_template('admin/reviews.html', reviews=reviews, status=status)
+    return render_template('admin/reviews.html', reviews=reviews, status=status, total_reviews=total_reviews)
 
 @app.route('/admin/reviews/approve/<int:id>')
 @admin_required
 def admin_approve_review(id):
-    review = Review.query.get_or_404(id)
-    review.status = 'approved'
+    # Single UPDATE by primary key; no need to load the review first
+    result = db.session.execute(db.update(Review).where(Review.id == id).values(status='approved'))
+    if result.rowcount == 0:
+        abort(404)
     db.session.commit()
     
     flash('Review approved successfully!', 'success')
@@ -1749,13 +2246,31 @@ def admin_approve_review(id):
 @app.route('/admin/reviews/reject/<int:id>')
 @admin_required
 def admin_reject_review(id):
-    review = Review.query.get_or_404(id)
-    review.status = 'rejected'
+    # Single UPDATE by primary key; no need to load the review first
+    result = db.session.execute(db.update(Review).where(Review.id == id).values(status='rejected'))
+    if result.rowcount == 0:
+        abort(404)
     db.session.commit()
     
     flash('Review rejected successfully!', 'success')
     return redirect(url_for('admin_reviews'))
 
+@app.route('/admin/reviews/bulk', methods=['POST'])
+@admin_required
+def admin_bulk_review():
+    ids = request.form.getlist('ids', type=int)
+    status = request.form.get('status')
+    if not ids or status not in ('approved', 'rejected'):
+        flash('Select at least one review to approve or reject.', 'warning')
+        return redirect(request.referrer or url_for('admin_reviews'))
+    
+    # One UPDATE ... WHERE id IN (...) for the whole selection
+    result = db.session.execute(db.update(Review).where(Review.id.in_(ids)).values(status=status))
+    db.session.commit()
+    
+    flash(f'{result.rowcount} review(s) {status}.', 'success')
+    return redirect(request.referrer or url_for('admin_reviews'))
+
 @app.route('/apply-promo', methods=['POST'])
 @login_required
 def apply_promo_old():
@@ -1854,34 +2369,32 @@ def remove_gift_card():
     return redirect(url_for('checkout'))
 
 # Error handlers
+# Error pages look the same for every anonymous visitor, so scanners and bots hitting
+# missing URLs get a copy rendered once instead of running Jinja per response
+error_page_cache = {}
+
+def render_error_page(template):
+    # The header shows the signed-in user and any pending flash messages; render those per request
+    if current_user.is_authenticated or session.get('_flashes'):
+        return render_template(template)
+    if template not in error_page_cache:
+        error_page_cache[template] = render_template(template)
+    return error_page_cache[template]
+
 @app.errorhandler(404)
 def not_found_error(error):
-    return render_template('404.html'), 404
+    return render_error_page('404.html'), 404
 
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
-    return render_template('500.html'), 500
+    return render_error_page('500.html'), 500
 
-# Create database tables
-created = False
-
-@app.before_request
-def create_tables():
-    global created
-    if not created:
+# Create database tables once at startup instead of checking on every request
+with app.app_context():
+    if app.config['AUTO_CREATE_TABLES']:
         db.create_all()
-        created = True
-
-@app.errorhandler(404)
-def not_found(e):
-    return render_template('500.html'), 404
-
-@app.errorhandler(500)
-def server_error(e):
-    import traceback
-    traceback.print_exc()
-    return render_template('500.html'), 500
+    detect_product_fts()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -9,8 +9,7 @@ from datetime import datetime, timedelta
 # Add the current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, User, Category, Product, Order, OrderItem, Review, FlashDeal, Offer, GiftCard, Message
-from werkzeug.security import generate_password_hash
+from app import app, db, password_hasher, User, Category, Product, Order, OrderItem, Review, FlashDeal, Offer, GiftCard, Message
 import random
 import string
 
@@ -32,50 +31,50 @@ def create_sample_data():
             print(f"[INFO] Current data: {Category.query.count()} categories, {Product.query.count()} products, {User.query.count()} users")
             return
         
+        # Hash each distinct sample password once; Argon2 is deliberately slow
+        seller_password_hash = password_hasher.hash('seller123')
+        customer_password_hash = password_hasher.hash('password123')
+        
         # Create admin user
         admin = User(
             name='Admin User',
             email='admin@lifestylemart.com',
-            password_hash=generate_password_hash('admin123'),
+            password_hash=password_hasher.hash('admin123'),
             role='admin',
             shop_name='Lifestyle Mart Official',
             shop_description='The official store of Lifestyle Mart Bangladesh.'
         )
-        db.session.add(admin)
         
         # Create official brand sellers
         brand_sellers = {
             'Bata': User(
-                name='Bata Official', email='bata@seller.bd', password_hash=generate_password_hash('seller123'),
+                name='Bata Official', email='bata@seller.bd', password_hash=seller_password_hash,
                 role='seller', shop_name='Bata Official Store',
                 shop_description='Step into comfort with Bata, the leading footwear brand in Bangladesh.'
             ),
             'Aarong': User(
-                name='Aarong Official', email='aarong@seller.bd', password_hash=generate_password_hash('seller123'),
+                name='Aarong Official', email='aarong@seller.bd', password_hash=seller_password_hash,
                 role='seller', shop_name='Aarong Official Store',
                 shop_description='Aarong is Bangladesh\'s leading lifestyle brand.'
             ),
             'Apex': User(
-                name='Apex Official', email='apex@seller.bd', password_hash=generate_password_hash('seller123'),
+                name='Apex Official', email='apex@seller.bd', password_hash=seller_password_hash,
                 role='seller', shop_name='Apex Official Store',
                 shop_description='Apex is a leading footwear brand in Bangladesh.'
             ),
             'Yellow': User(
-                name='Yellow Official', email='yellow@seller.bd', password_hash=generate_password_hash('seller123'),
+                name='Yellow Official', email='yellow@seller.bd', password_hash=seller_password_hash,
                 role='seller', shop_name='Yellow Official Store',
                 shop_description='Yellow is a leading fashion brand in Bangladesh.'
             ),
             'Walton': User(
-                name='Walton Official', email='walton@seller.bd', password_hash=generate_password_hash('seller123'),
+                name='Walton Official', email='walton@seller.bd', password_hash=seller_password_hash,
                 role='seller', shop_name='Walton Official Store',
                 shop_description='Walton is a leading electronics brand in Bangladesh.'
             )
         }
         
-        for s in brand_sellers.values():
-            db.session.add(s)
-        
-        db.session.commit()
+        db.session.add_all([admin, *brand_sellers.values()])
         
         # Create sample categories
         categories = [
@@ -87,10 +86,7 @@ def create_sample_data():
             Category(name='Home & Living', description='Home decor and lifestyle products')
         ]
         
-        for category in categories:
-            db.session.add(category)
-        
-        db.session.commit()
+        db.session.add_all(categories)
         
         # Create sample products (expanded with more products)
         products = [
@@ -555,18 +551,12 @@ def create_sample_data():
             },
         ]
         
-        for product_data in products:
-            # Map products to their brand sellers or default to admin
-            brand_name = product_data.get('brand', '')
-            product_seller = brand_sellers.get(brand_name, admin)
-            
-            product = Product(
-                **product_data,
-                seller_id=product_seller.id
-            )
-            db.session.add(product)
-        
-        db.session.commit()
+        # Map products to their brand sellers or default to admin (through the
+        # relationship, so the sellers don't need ids yet)
+        db.session.add_all([
+            Product(**product_data, seller=brand_sellers.get(product_data.get('brand', ''), admin))
+            for product_data in products
+        ])
         print(f"[INFO] Created {len(products)} products")
         
         # Create Flash Deals
@@ -606,11 +596,7 @@ def create_sample_data():
             },
         ]
         
-        for deal_data in flash_deals:
-            deal = FlashDeal(**deal_data)
-            db.session.add(deal)
-        
-        db.session.commit()
+        db.session.add_all([FlashDeal(**deal_data) for deal_data in flash_deals])
         print(f"[INFO] Created {len(flash_deals)} flash deals")
         
         # Create Offers/Promo Codes
@@ -650,11 +636,7 @@ def create_sample_data():
             },
         ]
         
-        for offer_data in offers:
-            offer = Offer(**offer_data)
-            db.session.add(offer)
-        
-        db.session.commit()
+        db.session.add_all([Offer(**offer_data) for offer_data in offers])
         print(f"[INFO] Created {len(offers)} offers")
         
         # Create Gift Cards
@@ -691,11 +673,7 @@ def create_sample_data():
             },
         ]
         
-        for card_data in gift_cards:
-            card = GiftCard(**card_data)
-            db.session.add(card)
-        
-        db.session.commit()
+        db.session.add_all([GiftCard(**card_data) for card_data in gift_cards])
         print(f"[INFO] Created {len(gift_cards)} gift cards")
         
         # Create sample users
@@ -703,59 +681,58 @@ def create_sample_data():
             {
                 'name': 'John Doe',
                 'email': 'john@example.com',
-                'password_hash': generate_password_hash('password123'),
+                'password_hash': customer_password_hash,
                 'phone': '01712345678',
                 'address': '123 Main St, Dhaka'
             },
             {
                 'name': 'Jane Smith',
                 'email': 'jane@example.com',
-                'password_hash': generate_password_hash('password123'),
+                'password_hash': customer_password_hash,
                 'phone': '01887654321',
                 'address': '456 Park Ave, Dhaka'
             },
             {
                 'name': 'Test User',
                 'email': 'test@example.com',
-                'password_hash': generate_password_hash('password123'),
+                'password_hash': customer_password_hash,
                 'phone': '01987654321',
                 'address': '789 Test Road, Dhaka'
             }
         ]
         
-        for user_data in users:
-            user = User(**user_data)
-            db.session.add(user)
-        
-        db.session.commit()
+        db.session.add_all([User(**user_data) for user_data in users])
         print(f"[INFO] Created {len(users)} users")
         
         # Create sample reviews
-        products_for_reviews = Product.query.limit(10).all()
-        users_for_reviews = User.query.all()
-        review_count = 0
-        
-        for product in products_for_reviews:
-            for user in users_for_reviews:
-                if random.random() > 0.6:  # 40% chance of review
-                    review = Review(
-                        product_id=product.id,
-                        user_id=user.id,
-                        rating=random.randint(3, 5),
-                        review_text=random.choice([
-                            'Great product! Highly recommend.',
-                            'Excellent quality for the price.',
-                            'Love this product! Will buy again.',
-                            'Good value for money.',
-                            'Perfect! Exactly as described.',
-                            'Very satisfied with my purchase.'
-                        ]),
-                        status='approved'
-                    )
-                    db.session.add(review)
-                    review_count += 1
+        # Only the ids are needed, so don't build full Product/User objects for them
+        product_ids_for_reviews = db.session.scalars(db.select(Product.id).order_by(Product.id).limit(10)).all()
+        user_ids_for_reviews = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+        review_texts = [
+            'Great product! Highly recommend.',
+            'Excellent quality for the price.',
+            'Love this product! Will buy again.',
+            'Good value for money.',
+            'Perfect! Exactly as described.',
+            'Very satisfied with my purchase.'
+        ]
+        reviews = [
+            {
+                'product_id': product_id,
+                'user_id': user_id,
+                'rating': random.randint(3, 5),
+                'review_text': random.choice(review_texts),
+                'status': 'approved'
+            }
+            for product_id in product_ids_for_reviews
+            for user_id in user_ids_for_reviews
+            if random.random() > 0.6  # 40% chance of review
+        ]
         
-        db.session.commit()
+        # Plain rows, so send them as one executemany INSERT without building ORM objects
+        if reviews:
+            db.session.execute(db.insert(Review), reviews)
+        review_count = len(reviews)
         
         # Create sample messages
         john = User.query.filter_by(email='john@example.com').first()
@@ -786,13 +763,12 @@ def create_sample_data():
                 }
             ]
             
-            for msg_data in messages:
-                msg = Message(**msg_data)
-                db.session.add(msg)
-            
-            db.session.commit()
+            db.session.add_all([Message(**msg_data) for msg_data in messages])
             print(f"[INFO] Created {len(messages)} sample messages")
         
+        # Everything above is written in one transaction; the ORM batches each table's INSERTs
+        db.session.commit()
+        
         print("\n" + "="*60)
         print("[OK] Database setup completed successfully!")
         print("="*60)
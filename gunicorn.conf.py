@@ -0,0 +1,15 @@
+"""
+Gunicorn settings - picked up automatically by `gunicorn app:app` from this directory.
+"""
+import os
+
+# Threaded workers: Argon2 hashing releases the GIL, so a login or signup
+# hashing in one thread does not hold up the other requests of its worker.
+# Worker processes still come from WEB_CONCURRENCY (gunicorn's own default).
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+def on_starting(server):
+    # app.py checks WEB_CONCURRENCY to decide whether its in-process cache is safe;
+    # pass on the real worker count, which a -w flag may have set instead
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
@@ -0,0 +1,32 @@
+"""
+Migration script: Recreate the products full-text search update trigger so it only
+fires when name, description or brand change. CREATE TRIGGER IF NOT EXISTS keeps an
+existing trigger as it is, so databases created before the change still re-index
+products on every stock or price update until this runs. Safe to re-run.
+"""
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+
+with app.app_context():
+    print(f"[*] Using database: {db.engine.url}")
+
+    if db.engine.dialect.name != 'sqlite':
+        print("[SKIP] Full-text search triggers only exist on SQLite")
+    else:
+        with db.engine.begin() as conn:
+            trigger_sql = conn.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'products_fts_au'"
+            ).scalar()
+            if trigger_sql is None or 'UPDATE OF' in trigger_sql:
+                print("[SKIP] Update trigger is missing or already restricted: products_fts_au")
+            else:
+                conn.exec_driver_sql("DROP TRIGGER products_fts_au")
+                print("[OK] Dropped old trigger: products_fts_au")
+
+        # create_all() recreates the trigger with the current definition
+        db.create_all()
+        print("[OK] Full-text search triggers are up to date")
+
+print("\n[SUCCESS] FTS trigger migration complete!")
@@ -0,0 +1,19 @@
+"""
+Migration script: Create the indexes declared on the models.
+db.create_all() only builds indexes for brand-new tables, so run this once
+to add them to an existing database without losing data. Safe to re-run.
+"""
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+
+with app.app_context():
+    print(f"[*] Using database: {db.engine.url}")
+
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            index.create(bind=db.engine, checkfirst=True)
+            print(f"[OK] {table.name}: {index.name}")
+
+print("\n[SUCCESS] Index migration complete!")
@@ -0,0 +1,41 @@
+"""
+Migration script: Add item_count, subtotal and discount columns to the orders table
+and fill them in for existing orders from their order items.
+Run this once to update the existing database without losing data. Safe to re-run.
+"""
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from app import app, db, Order, OrderItem
+
+with app.app_context():
+    print(f"[*] Using database: {db.engine.url}")
+
+    with db.engine.begin() as conn:
+        op = Operations(MigrationContext.configure(conn))
+        columns = [c['name'] for c in db.inspect(conn).get_columns('orders')]
+
+        for name in ('item_count', 'subtotal', 'discount'):
+            if name in columns:
+                print(f"[SKIP] Column already exists: {name}")
+                continue
+            column = Order.__table__.columns[name]
+            op.add_column('orders', db.Column(name, column.type))
+            print(f"[OK] Added column: {name}")
+
+        # Backfill orders placed before the columns existed
+        lines = db.select(OrderItem.__table__).where(OrderItem.order_id == Order.id)
+        result = conn.execute(
+            db.update(Order.__table__)
+            .where(Order.item_count.is_(None))
+            .values(
+                item_count=lines.with_only_columns(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).scalar_subquery(),
+                subtotal=lines.with_only_columns(db.func.coalesce(db.func.sum(OrderItem.total), 0)).scalar_subquery(),
+                discount=0,
+            )
+        )
+        print(f"[OK] Backfilled {result.rowcount} orders")
+
+print("\n[SUCCESS] Order totals migration complete!")
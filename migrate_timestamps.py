@@ -0,0 +1,44 @@
+"""
+Migration script: Give every created_at/updated_at column a server-side CURRENT_TIMESTAMP
+default. The models no longer send these timestamps from Python, so existing databases
+need the column default added. SQLite tables are rebuilt in place (batch mode); other
+databases get a plain ALTER COLUMN. Safe to re-run.
+"""
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from app import app, db
+
+with app.app_context():
+    print(f"[*] Using database: {db.engine.url}")
+
+    with db.engine.begin() as conn:
+        op = Operations(MigrationContext.configure(conn))
+        inspector = db.inspect(conn)
+        existing_tables = inspector.get_table_names()
+
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                print(f"[SKIP] Table does not exist yet: {table.name}")
+                continue
+            current_columns = {c['name']: c for c in inspector.get_columns(table.name)}
+
+            for column_name in ('created_at', 'updated_at'):
+                column = table.columns.get(column_name)
+                if column is None or column.server_default is None:
+                    continue
+                if current_columns[column_name].get('default'):
+                    print(f"[SKIP] Default already set: {table.name}.{column_name}")
+                    continue
+
+                with op.batch_alter_table(table.name) as batch_op:
+                    batch_op.alter_column(column_name, existing_type=db.DateTime,
+                                          server_default=db.func.current_timestamp())
+                print(f"[OK] Added default: {table.name}.{column_name}")
+
+    # Rebuilt tables lose their triggers; create_all() puts the search triggers back
+    db.create_all()
+
+print("\n[SUCCESS] Timestamp migration complete!")